@@ -4,11 +4,13 @@ Configuration management for TTS Gateway
 """
 
 import os
-from functools import lru_cache
-from typing import Optional
+import logging
+from typing import Dict, Optional
 
 from pydantic import BaseSettings, validator
 
+logger = logging.getLogger(__name__)
+
 
 class Settings(BaseSettings):
     """Application settings with environment variable support"""
@@ -17,6 +19,8 @@ class Settings(BaseSettings):
     port: int = 8000
     debug: bool = False
     log_level: str = "info"
+    # Worker processes when run directly; defaults to one per CPU
+    workers: Optional[int] = None
     
     # Model endpoints - these should be set via environment variables
     kokkoro_endpoint: Optional[str] = None
@@ -30,6 +34,15 @@ class Settings(BaseSettings):
     default_timeout: float = 60.0
     max_retries: int = 3
     
+    # Return trusted model responses as-is instead of re-validating them
+    passthrough_responses: bool = True
+    
+    # Wire format for gateway -> model traffic ("json" or "msgpack"). msgpack
+    # is only used with models that advertise it in their health response, and
+    # only where the gateway decodes the model response: with passthrough
+    # responses off (or debug on) and for the binary fallback
+    upstream_wire_format: str = "json"
+    
     # Security settings (for production)
     api_key: Optional[str] = None
     allowed_origins: list = ["*"]
@@ -46,6 +59,13 @@ class Settings(BaseSettings):
             raise ValueError("Endpoint must start with http:// or https://")
         return v
     
+    @validator("upstream_wire_format")
+    def validate_wire_format(cls, v):
+        """Validate upstream wire format"""
+        if v not in ("json", "msgpack"):
+            raise ValueError("Upstream wire format must be 'json' or 'msgpack'")
+        return v
+    
     @validator("port")
     def validate_port(cls, v):
         """Validate port number"""
@@ -61,27 +81,51 @@ class Settings(BaseSettings):
         """Check if model endpoint is configured"""
         endpoint = self.get_model_endpoint(model_name)
         return endpoint is not None and endpoint.strip() != ""
+    
+    def model_endpoints(self) -> Dict[str, Optional[str]]:
+        """Get endpoints for all models keyed by model name"""
+        return {
+            "kokkoro": self.kokkoro_endpoint,
+            "chatterbox": self.chatterbox_endpoint
+        }
+
+
+# Settings are a process-wide singleton; a plain global avoids cache bookkeeping
+# on every Depends(get_settings) call
+_SETTINGS: Optional[Settings] = None
+_ENDPOINT_MAP: Optional[Dict[str, Optional[str]]] = None
 
 
-@lru_cache()
 def get_settings() -> Settings:
     """Get cached settings instance"""
-    return Settings()
+    global _SETTINGS
+    if _SETTINGS is None:
+        _SETTINGS = Settings()
+    return _SETTINGS
+
+
+def get_endpoint_map() -> Dict[str, Optional[str]]:
+    """Get cached model name -> endpoint map for the application settings"""
+    global _ENDPOINT_MAP
+    if _ENDPOINT_MAP is None:
+        _ENDPOINT_MAP = get_settings().model_endpoints()
+    return _ENDPOINT_MAP
 
 
 def load_environment():
-    """Load environment variables from .env file if it exists"""
+    """
+    Load environment variables from .env file if it exists
+    
+    Settings() already reads .env via Config.env_file; this is only needed
+    by code that reads os.environ directly.
+    """
     env_file = ".env"
     if os.path.exists(env_file):
         from dotenv import load_dotenv
         load_dotenv(env_file)
-        print(f"Loaded environment variables from {env_file}")
+        logger.info("Loaded environment variables from %s", env_file)
     else:
-        print("No .env file found, using system environment variables")
-
-
-# Load environment on import
-load_environment()
+        logger.info("No .env file found, using system environment variables")
 
 
 # Development/testing helper functions
@@ -107,6 +151,7 @@ def get_production_settings() -> Settings:
 
 def get_runpod_settings() -> Settings:
     """Get settings configured for RunPod deployment"""
+    load_environment()
     return Settings(
         debug=False,
         log_level="info",
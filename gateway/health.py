@@ -4,28 +4,50 @@ Health check endpoints for TTS Gateway
 """
 
 import time
+import itertools
 import psutil
 import asyncio
 import httpx
 from datetime import datetime, timezone
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 
 from models import HealthResponse, ModelInfo
-from config import Settings, get_settings
+from config import Settings, get_settings, get_endpoint_map
+from http_client import get_http_client
 
 # Global variables for tracking
 start_time = time.time()
-request_counter = 0
+_request_counter = itertools.count(1)
+_request_count = [0]
 
 health_router = APIRouter()
 
+# Model health results are cached per health URL to collapse probe storms
+HEALTH_CACHE_TTL = 3.0
+_health_cache: Dict[str, Tuple[float, bool]] = {}
+_health_locks: Dict[str, asyncio.Lock] = {}
+
+# System stats are cached briefly; they cannot change meaningfully faster
+SYSTEM_STATS_TTL = 1.0
+_stats_cache: Dict[str, Any] = {"t": 0.0, "v": None}
+
 def increment_request_count():
     """Increment global request counter"""
-    global request_counter
-    request_counter += 1
+    _request_count[0] = next(_request_counter)
+
+def get_request_count() -> int:
+    """Get total number of counted requests"""
+    return _request_count[0]
+
+def init_system_stats() -> None:
+    """Prime the CPU usage sampler so later non-blocking reads are meaningful"""
+    try:
+        psutil.cpu_percent(interval=None)
+    except Exception:
+        pass
 
 def get_uptime() -> float:
     """Get service uptime in seconds"""
@@ -33,49 +55,91 @@ def get_uptime() -> float:
 
 def get_system_stats() -> Dict[str, Optional[float]]:
     """Get system resource usage statistics"""
+    now = time.monotonic()
+    if _stats_cache["v"] is not None and now - _stats_cache["t"] < SYSTEM_STATS_TTL:
+        return _stats_cache["v"]
+    
     try:
         memory = psutil.virtual_memory()
-        cpu_percent = psutil.cpu_percent(interval=1)
+        # Non-blocking: usage since the previous call
+        cpu_percent = psutil.cpu_percent(interval=None)
         
-        return {
+        stats = {
             "memory_usage": memory.percent,
             "cpu_usage": cpu_percent
         }
     except Exception:
-        return {
+        stats = {
             "memory_usage": None,
             "cpu_usage": None
         }
+    
+    _stats_cache["t"] = now
+    _stats_cache["v"] = stats
+    return stats
 
-async def check_model_health(endpoint: str, timeout: float = 5.0) -> bool:
-    """Check if a model endpoint is healthy"""
+async def probe_model_health(
+    health_url: str, 
+    client: httpx.AsyncClient, 
+    timeout: float = 5.0
+) -> bool:
+    """Probe a model endpoint's health route"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{endpoint}/health", timeout=timeout)
-            return response.status_code == 200
+        response = await client.get(health_url, timeout=timeout)
+        return response.status_code == 200
     except Exception:
         return False
 
-async def get_models_status(settings: Settings) -> Dict[str, bool]:
+async def check_model_health(
+    health_url: str, 
+    client: httpx.AsyncClient, 
+    timeout: float = 5.0,
+    fresh: bool = False
+) -> bool:
+    """Check if a model endpoint is healthy, using a short-lived cache"""
+    lock = _health_locks.setdefault(health_url, asyncio.Lock())
+    
+    # Concurrent checks for the same endpoint share a single probe
+    async with lock:
+        cached = _health_cache.get(health_url)
+        if not fresh and cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL:
+            return cached[1]
+        
+        is_healthy = await probe_model_health(health_url, client, timeout)
+        _health_cache[health_url] = (time.monotonic(), is_healthy)
+        return is_healthy
+
+async def get_models_status(
+    model_urls: Dict[str, Dict[str, str]], 
+    client: httpx.AsyncClient, 
+    fresh: bool = False
+) -> Dict[str, bool]:
     """Get health status of all configured models"""
-    models_status = {}
+    # Every known model is reported, configured or not
+    models_status = {name: False for name in get_endpoint_map()}
     
-    # Check Kokkoro
-    if settings.kokkoro_endpoint:
-        models_status["kokkoro"] = await check_model_health(settings.kokkoro_endpoint)
-    else:
-        models_status["kokkoro"] = False
+    # Probe all configured models concurrently
+    configured = [
+        (name, model_urls[name]["health"])
+        for name in models_status
+        if name in model_urls
+    ]
+    results = await asyncio.gather(
+        *(check_model_health(url, client, fresh=fresh) for _, url in configured),
+        return_exceptions=True
+    )
     
-    # Check Chatterbox
-    if settings.chatterbox_endpoint:
-        models_status["chatterbox"] = await check_model_health(settings.chatterbox_endpoint)
-    else:
-        models_status["chatterbox"] = False
+    for (name, _), result in zip(configured, results):
+        models_status[name] = result is True
     
     return models_status
 
 @health_router.get("/", response_model=HealthResponse)
-async def health_check(settings: Settings = Depends(get_settings)) -> HealthResponse:
+async def health_check(
+    request: Request,
+    settings: Settings = Depends(get_settings),
+    client: httpx.AsyncClient = Depends(get_http_client)
+) -> HealthResponse:
     """
     Comprehensive health check endpoint
     Returns overall service health and model availability
@@ -86,7 +150,7 @@ async def health_check(settings: Settings = Depends(get_settings)) -> HealthResp
     system_stats = get_system_stats()
     
     # Check model availability
-    models_status = await get_models_status(settings)
+    models_status = await get_models_status(request.app.state.model_urls, client)
     
     # Determine overall status
     any_model_available = any(models_status.values())
@@ -97,7 +161,7 @@ async def health_check(settings: Settings = Depends(get_settings)) -> HealthResp
         timestamp=datetime.now(timezone.utc).isoformat(),
         version="1.0.0",
         uptime=get_uptime(),
-        request_count=request_counter,
+        request_count=get_request_count(),
         models=models_status,
         memory_usage=system_stats["memory_usage"],
         cpu_usage=system_stats["cpu_usage"]
@@ -111,73 +175,80 @@ async def quick_health_check():
     """
     increment_request_count()
     
-    return JSONResponse(
-        content={"status": "ok", "timestamp": datetime.now(timezone.utc).isoformat()},
+    return ORJSONResponse(
+        content={"status": "ok", "timestamp": datetime.now(timezone.utc)},
         status_code=200
     )
 
 @health_router.get("/models")
-async def models_health_check(settings: Settings = Depends(get_settings)):
+async def models_health_check(
+    request: Request,
+    fresh: bool = False,
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
     """
     Detailed health check for all models
+    Pass fresh=1 to bypass the cached probe results
     """
-    models_status = await get_models_status(settings)
+    models_status = await get_models_status(request.app.state.model_urls, client, fresh=fresh)
+    endpoints = request.app.state.endpoint_map
     
-    detailed_status = {}
-    for model_name, is_healthy in models_status.items():
-        endpoint = getattr(settings, f"{model_name}_endpoint", None)
-        detailed_status[model_name] = {
-            "healthy": is_healthy,
-            "endpoint": endpoint,
-            "configured": bool(endpoint)
-        }
+    detailed_status = {
+        name: {"healthy": healthy, "endpoint": endpoints[name], "configured": bool(endpoints[name])}
+        for name, healthy in models_status.items()
+    }
     
-    return {
+    return ORJSONResponse(content={
         "models": detailed_status,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": datetime.now(timezone.utc),
         "total_healthy": sum(models_status.values()),
-        "total_configured": len([m for m in detailed_status.values() if m["configured"]])
-    }
+        "total_configured": sum(1 for endpoint in endpoints.values() if endpoint)
+    })
 
 @health_router.get("/models/{model_name}")
 async def single_model_health_check(
     model_name: str, 
-    settings: Settings = Depends(get_settings)
+    request: Request,
+    client: httpx.AsyncClient = Depends(get_http_client)
 ):
     """
     Health check for a specific model
     """
-    if model_name not in ["kokkoro", "chatterbox"]:
+    timestamp = datetime.now(timezone.utc)
+    
+    if model_name not in get_endpoint_map():
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Model '{model_name}' not found"
         )
     
-    endpoint = getattr(settings, f"{model_name}_endpoint", None)
+    endpoint = request.app.state.endpoint_map.get(model_name)
     
     if not endpoint:
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "model": model_name,
                 "healthy": False,
                 "configured": False,
                 "error": f"Model {model_name} is not configured",
-                "timestamp": datetime.now(timezone.utc).isoformat()
+                "timestamp": timestamp
             },
             status_code=503
         )
     
-    is_healthy = await check_model_health(endpoint)
+    is_healthy = await check_model_health(
+        request.app.state.model_urls[model_name]["health"], client
+    )
     
     status_code = 200 if is_healthy else 503
     
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "model": model_name,
             "healthy": is_healthy,
             "configured": True,
             "endpoint": endpoint,
-            "timestamp": datetime.now(timezone.utc).isoformat()
+            "timestamp": timestamp
         },
         status_code=status_code
     )
@@ -188,12 +259,14 @@ async def service_stats():
     Service statistics and metrics
     """
     system_stats = get_system_stats()
+    request_count = get_request_count()
+    uptime = get_uptime()
     
-    return {
-        "uptime_seconds": get_uptime(),
-        "total_requests": request_counter,
-        "requests_per_second": request_counter / max(get_uptime(), 1),
+    return ORJSONResponse(content={
+        "uptime_seconds": uptime,
+        "total_requests": request_count,
+        "requests_per_second": request_count / max(uptime, 1),
         "memory_usage_percent": system_stats["memory_usage"],
         "cpu_usage_percent": system_stats["cpu_usage"],
-        "timestamp": datetime.now(timezone.utc).isoformat()
-    }
+        "timestamp": datetime.now(timezone.utc)
+    })
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for TTS Gateway
+"""
+
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException, status
+
+# Global HTTP client, owned by the application lifespan
+http_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client used for all model traffic"""
+    global http_client
+
+    # Fail fast on connect/pool acquisition, allow long reads for slow inference
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(connect=2.0, read=60.0, write=10.0, pool=2.0),
+        limits=httpx.Limits(
+            max_keepalive_connections=50,
+            max_connections=200,
+            keepalive_expiry=60.0
+        )
+    )
+    return http_client
+
+
+async def close_http_client() -> None:
+    """Close the pooled HTTP client"""
+    global http_client
+
+    if http_client:
+        await http_client.aclose()
+        http_client = None
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Dependency to get HTTP client"""
+    if not http_client:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="HTTP client not available"
+        )
+    return http_client
@@ -4,21 +4,29 @@ TTS Gateway Service - Routes requests to appropriate TTS models
 """
 
 import os
+import sys
+import base64
 import asyncio
 import httpx
 import logging
+import msgpack
 from typing import Dict, Any, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, status
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Query, status
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 import uvicorn
 
-from config import Settings, get_settings
-from models import TTSRequest, TTSResponse, HealthResponse
-from health import health_router
+from config import Settings, get_settings, get_endpoint_map
+from models import (
+    TTSRequest, TTSResponse, HealthResponse,
+    dump_tts_request, dump_tts_response, parse_tts_response
+)
+from health import health_router, init_system_stats
+from http_client import create_http_client, close_http_client, get_http_client
 
 # Configure logging
 logging.basicConfig(
@@ -27,37 +35,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global HTTP client
-http_client: Optional[httpx.AsyncClient] = None
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    global http_client
     
     # Startup
     logger.info("Starting TTS Gateway...")
-    http_client = httpx.AsyncClient(
-        timeout=httpx.Timeout(60.0),
-        limits=httpx.Limits(max_keepalive_connections=10, max_connections=100)
-    )
+    http_client = create_http_client()
+    init_system_stats()
     
-    # Validate model endpoints on startup
-    settings = get_settings()
-    await validate_model_endpoints(settings)
+    # Resolve endpoints and model URLs once instead of per request
+    app.state.endpoint_map = get_endpoint_map()
+    app.state.model_urls = build_model_urls(app.state.endpoint_map)
+    
+    # Validate model endpoints on startup and negotiate the wire format;
+    # models unreachable now are negotiated on first use instead
+    app.state.msgpack_models = await validate_model_endpoints(
+        app.state.endpoint_map, http_client, app.state.model_urls
+    )
     
     yield
     
     # Shutdown
     logger.info("Shutting down TTS Gateway...")
-    if http_client:
-        await http_client.aclose()
+    await close_http_client()
 
 # Create FastAPI app
 app = FastAPI(
     title="TTS Gateway",
     description="Centralized gateway for multiple TTS models",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -78,36 +86,94 @@ MODEL_ENDPOINTS = {
     "kokkoro": "KOKKORO_ENDPOINT",
     "chatterbox": "CHATTERBOX_ENDPOINT"
 }
+MODEL_NAMES = frozenset(MODEL_ENDPOINTS)
+MODEL_NAMES_LIST = tuple(MODEL_ENDPOINTS)
+AVAILABLE_MODELS_HINT = f"Available models: {list(MODEL_NAMES_LIST)}"
 
-async def validate_model_endpoints(settings: Settings) -> None:
-    """Validate that all model endpoints are accessible"""
-    if not http_client:
-        logger.error("HTTP client not initialized")
-        return
-        
-    for model_name, env_var in MODEL_ENDPOINTS.items():
-        endpoint = getattr(settings, env_var.lower(), None)
+# Model service routes, resolved to full URLs per endpoint at startup
+MODEL_URL_PATHS = {
+    "health": "/health",
+    "generate": "/generate",
+    "generate_raw": "/generate/raw",
+    "generate_msgpack": "/generate/msgpack",
+    "generate_stream": "/generate/stream"
+}
+
+def build_model_urls(endpoint_map: Dict[str, Optional[str]]) -> Dict[str, Dict[str, str]]:
+    """Build the route URLs for every configured model endpoint"""
+    return {
+        model_name: {route: f"{endpoint}{path}" for route, path in MODEL_URL_PATHS.items()}
+        for model_name, endpoint in endpoint_map.items()
+        if endpoint
+    }
+
+async def validate_model_endpoint(
+    model_name: str, 
+    endpoint: str, 
+    health_url: str, 
+    http_client: httpx.AsyncClient
+) -> Optional[bool]:
+    """
+    Validate that a single model endpoint is accessible
+    
+    Returns whether the endpoint advertises MessagePack support, or None
+    if it could not be reached.
+    """
+    try:
+        response = await http_client.get(health_url, timeout=10.0)
+        if response.status_code == 200:
+            logger.info("✓ %s endpoint is healthy: %s", model_name, endpoint)
+            return "msgpack" in response.json().get("wire_formats", [])
+        else:
+            logger.warning(
+                "✗ %s endpoint unhealthy: %s (status: %s)", model_name, endpoint, response.status_code
+            )
+    except Exception as e:
+        logger.error("✗ Cannot reach %s endpoint %s: %s", model_name, endpoint, e)
+    return None
+
+async def validate_model_endpoints(
+    endpoint_map: Dict[str, Optional[str]], 
+    http_client: httpx.AsyncClient, 
+    model_urls: Dict[str, Dict[str, str]]
+) -> Dict[str, bool]:
+    """
+    Validate that all model endpoints are accessible
+    
+    Returns whether each reachable model accepts MessagePack requests.
+    """
+    probes = {}
+    
+    for model_name, endpoint in endpoint_map.items():
         if not endpoint:
-            logger.warning(f"No endpoint configured for {model_name}")
+            logger.warning("No endpoint configured for %s", model_name)
             continue
-            
-        try:
-            response = await http_client.get(f"{endpoint}/health", timeout=10.0)
-            if response.status_code == 200:
-                logger.info(f"✓ {model_name} endpoint is healthy: {endpoint}")
-            else:
-                logger.warning(f"✗ {model_name} endpoint unhealthy: {endpoint} (status: {response.status_code})")
-        except Exception as e:
-            logger.error(f"✗ Cannot reach {model_name} endpoint {endpoint}: {str(e)}")
+        probes[model_name] = validate_model_endpoint(
+            model_name, endpoint, model_urls[model_name]["health"], http_client
+        )
+    
+    # Probe all endpoints concurrently
+    results = await asyncio.gather(*probes.values())
+    return {name: msgpack_ok for name, msgpack_ok in zip(probes, results) if msgpack_ok is not None}
 
-async def get_http_client() -> httpx.AsyncClient:
-    """Dependency to get HTTP client"""
-    if not http_client:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="HTTP client not available"
+async def use_msgpack(
+    model_name: str,
+    model_urls: Dict[str, str],
+    client: httpx.AsyncClient
+) -> bool:
+    """Whether to talk MessagePack to a model, negotiating it on first use if needed"""
+    if get_settings().upstream_wire_format != "msgpack":
+        return False
+    
+    negotiated = app.state.msgpack_models
+    if model_name not in negotiated:
+        # The model was unreachable at startup; ask again now that it is in use
+        msgpack_ok = await validate_model_endpoint(
+            model_name, app.state.endpoint_map[model_name], model_urls["health"], client
         )
-    return http_client
+        if msgpack_ok is not None:
+            negotiated[model_name] = msgpack_ok
+    return negotiated.get(model_name, False)
 
 @app.get("/")
 async def root():
@@ -115,7 +181,7 @@ async def root():
     return {
         "service": "TTS Gateway",
         "version": "1.0.0",
-        "available_models": list(MODEL_ENDPOINTS.keys()),
+        "available_models": MODEL_NAMES_LIST,
         "endpoints": {
             "health": "/health",
             "generate": "/tts/{model_name}",
@@ -126,11 +192,9 @@ async def root():
 @app.get("/models")
 async def list_models():
     """List available TTS models"""
-    settings = get_settings()
     models_status = {}
     
-    for model_name, env_var in MODEL_ENDPOINTS.items():
-        endpoint = getattr(settings, env_var.lower(), None)
+    for model_name, endpoint in app.state.endpoint_map.items():
         models_status[model_name] = {
             "available": bool(endpoint),
             "endpoint": endpoint if endpoint else "Not configured"
@@ -142,51 +206,168 @@ async def list_models():
     }
 
 async def forward_request(
-    endpoint: str, 
+    url: str, 
     request_data: dict, 
     client: httpx.AsyncClient,
-    timeout: float = 60.0
+    timeout: float = 60.0,
+    stream: bool = False,
+    wire_format: str = "json"
 ) -> httpx.Response:
-    """Forward request to model endpoint with proper error handling"""
+    """
+    Forward request to model endpoint with proper error handling
+    
+    With stream=True the response body is not read; the caller must
+    consume it and close the response. With wire_format="msgpack" the
+    request body is MessagePack encoded.
+    """
     try:
-        logger.info(f"Forwarding request to: {endpoint}")
-        logger.debug(f"Request data: {request_data}")
+        logger.info("Forwarding request to: %s", url)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request data: %s", request_data)
         
-        response = await client.post(
-            f"{endpoint}/generate",
-            json=request_data,
-            timeout=timeout,
-            headers={"Content-Type": "application/json"}
-        )
+        if wire_format == "msgpack":
+            upstream_request = client.build_request(
+                "POST",
+                url,
+                content=msgpack.packb(request_data, use_bin_type=True),
+                timeout=timeout,
+                headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+            )
+        else:
+            upstream_request = client.build_request(
+                "POST",
+                url,
+                json=request_data,
+                timeout=timeout,
+                headers={"Content-Type": "application/json"}
+            )
+        response = await client.send(upstream_request, stream=stream)
         
-        logger.info(f"Received response from {endpoint}: {response.status_code}")
+        logger.info("Received response from %s: %s", url, response.status_code)
         return response
         
     except httpx.TimeoutException:
-        logger.error(f"Timeout while forwarding to {endpoint}")
+        logger.error("Timeout while forwarding to %s", url)
         raise HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail=f"Model endpoint timeout: {endpoint}"
+            detail=f"Model endpoint timeout: {url}"
         )
     except httpx.RequestError as e:
-        logger.error(f"Request error while forwarding to {endpoint}: {str(e)}")
+        logger.error("Request error while forwarding to %s: %s", url, e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Cannot reach model endpoint: {endpoint}"
+            detail=f"Cannot reach model endpoint: {url}"
         )
     except Exception as e:
-        logger.error(f"Unexpected error while forwarding to {endpoint}: {str(e)}")
+        logger.error("Unexpected error while forwarding to %s: %s", url, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
 
+def raise_model_error(response: httpx.Response) -> None:
+    """Raise an HTTPException for an error response from a model endpoint"""
+    if response.status_code == 422:
+        error_detail = response.json().get("detail", "Validation error")
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Model validation error: {error_detail}"
+        )
+    
+    error_detail = response.text if response.text else f"HTTP {response.status_code}"
+    raise HTTPException(
+        status_code=response.status_code,
+        detail=f"Model endpoint error: {error_detail}"
+    )
+
+async def fetch_model_response(
+    model_name: str,
+    model_urls: Dict[str, str],
+    request_data: dict,
+    client: httpx.AsyncClient
+) -> Dict[str, Any]:
+    """
+    Generate audio and return the decoded model response
+    
+    Uses MessagePack with models that negotiated it, in which case audio_data
+    is raw bytes; otherwise audio_data is a base64 string.
+    """
+    if await use_msgpack(model_name, model_urls, client):
+        response = await forward_request(
+            model_urls["generate_msgpack"], request_data, client, wire_format="msgpack"
+        )
+        if response.status_code == 200:
+            return msgpack.unpackb(response.content, raw=False)
+        if response.status_code not in (404, 415):
+            raise_model_error(response)
+        
+        # The model no longer accepts MessagePack (e.g. redeployed); use JSON from now on
+        logger.info("MessagePack rejected by %s, falling back to JSON", model_name)
+        app.state.msgpack_models[model_name] = False
+    
+    response = await forward_request(model_urls["generate"], request_data, client)
+    if response.status_code != 200:
+        raise_model_error(response)
+    return response.json()
+
+async def generate_tts_binary(
+    model_name: str,
+    model_urls: Dict[str, str],
+    request_data: dict,
+    client: httpx.AsyncClient
+) -> Response:
+    """
+    Return raw audio bytes instead of base64 encoded JSON
+    
+    Streams from the model's /generate/raw endpoint when available, and
+    falls back to decoding the regular JSON response otherwise.
+    """
+    headers = {"Content-Disposition": f"attachment; filename=tts_{model_name}.wav"}
+    
+    response = await forward_request(
+        model_urls["generate_raw"], request_data, client, stream=True
+    )
+    
+    if response.status_code == 200:
+        # Keep the upstream stream open until the last chunk is sent
+        return StreamingResponse(
+            response.aiter_bytes(chunk_size=64 * 1024),
+            media_type=response.headers.get("content-type", "audio/wav"),
+            headers=headers,
+            background=BackgroundTask(response.aclose)
+        )
+    
+    await response.aread()
+    await response.aclose()
+    if response.status_code != 404:
+        raise_model_error(response)
+    
+    # Raw audio not supported by the model, decode the regular response instead
+    logger.info("Raw audio not supported for %s, decoding model response", model_name)
+    response_data = await fetch_model_response(model_name, model_urls, request_data, client)
+    
+    audio_data = response_data.get("audio_data")
+    if not response_data.get("success") or not audio_data:
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Model endpoint error: {response_data.get('error') or 'No audio returned'}"
+        )
+    
+    if isinstance(audio_data, str):
+        audio_data = base64.b64decode(audio_data)
+    
+    return Response(content=audio_data, media_type="audio/wav", headers=headers)
+
 @app.post("/tts/{model_name}", response_model=TTSResponse)
 async def generate_tts(
     model_name: str,
     request: TTSRequest,
     settings: Settings = Depends(get_settings),
-    client: httpx.AsyncClient = Depends(get_http_client)
+    client: httpx.AsyncClient = Depends(get_http_client),
+    response_format: Optional[str] = Query(
+        None, alias="format", description="Set to 'binary' to receive raw audio"
+    ),
+    accept: Optional[str] = Header(None)
 ) -> TTSResponse:
     """
     Generate TTS audio using specified model
@@ -194,60 +375,62 @@ async def generate_tts(
     Args:
         model_name: Name of the TTS model (kokkoro, chatterbox)
         request: TTS generation request
+        response_format: 'binary' to return raw audio instead of JSON
+        accept: 'audio/wav' also selects the raw audio response
         
     Returns:
-        TTSResponse with generated audio data
+        TTSResponse with generated audio data, or raw audio bytes
     """
     
     # Validate model name
-    if model_name not in MODEL_ENDPOINTS:
+    if model_name not in MODEL_NAMES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unknown model: {model_name}. Available models: {list(MODEL_ENDPOINTS.keys())}"
+            detail=f"Unknown model: {model_name}. {AVAILABLE_MODELS_HINT}"
         )
     
     # Get model endpoint
-    env_var = MODEL_ENDPOINTS[model_name]
-    endpoint = getattr(settings, env_var.lower(), None)
+    endpoint = app.state.endpoint_map.get(model_name)
     
     if not endpoint:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=f"Model {model_name} is not configured. Please set {env_var} environment variable."
+            detail=f"Model {model_name} is not configured. Please set {MODEL_ENDPOINTS[model_name]} environment variable."
         )
     
+    model_urls = app.state.model_urls[model_name]
+    
     # Prepare request data
-    request_data = request.dict()
+    request_data = dump_tts_request(request)
     request_data["model"] = model_name  # Add model info for the endpoint
     
     # Forward request to model endpoint
     try:
-        response = await forward_request(endpoint, request_data, client)
+        if response_format == "binary" or (accept and "audio/wav" in accept):
+            return await generate_tts_binary(model_name, model_urls, request_data, client)
         
-        # Handle successful response
-        if response.status_code == 200:
-            response_data = response.json()
-            return TTSResponse(**response_data)
+        # Skip decode/validate/encode of the trusted upstream JSON body
+        if settings.passthrough_responses and not settings.debug:
+            response = await forward_request(model_urls["generate"], request_data, client)
+            if response.status_code == 200:
+                return Response(content=response.content, media_type="application/json")
+            
+            # Handle error responses from model endpoint
+            raise_model_error(response)
         
-        # Handle error responses from model endpoint
-        elif response.status_code == 422:
-            error_detail = response.json().get("detail", "Validation error")
-            raise HTTPException(
-                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Model validation error: {error_detail}"
-            )
-        else:
-            error_detail = response.text if response.text else f"HTTP {response.status_code}"
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Model endpoint error: {error_detail}"
-            )
+        response_data = await fetch_model_response(model_name, model_urls, request_data, client)
+        if isinstance(response_data.get("audio_data"), bytes):
+            response_data["audio_data"] = base64.b64encode(response_data["audio_data"]).decode("utf-8")
+        
+        # Validate once here; returning a Response keeps FastAPI from
+        # validating against response_model a second time
+        return ORJSONResponse(content=dump_tts_response(parse_tts_response(response_data)))
             
     except HTTPException:
         # Re-raise HTTP exceptions as-is
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in generate_tts: {str(e)}")
+        logger.error("Unexpected error in generate_tts: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -264,14 +447,13 @@ async def generate_tts_stream(
     Generate TTS audio with streaming response (if supported by model)
     """
     
-    if model_name not in MODEL_ENDPOINTS:
+    if model_name not in MODEL_NAMES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Unknown model: {model_name}"
         )
     
-    env_var = MODEL_ENDPOINTS[model_name]
-    endpoint = getattr(settings, env_var.lower(), None)
+    endpoint = app.state.endpoint_map.get(model_name)
     
     if not endpoint:
         raise HTTPException(
@@ -280,46 +462,55 @@ async def generate_tts_stream(
         )
     
     # Try streaming endpoint first, fall back to regular if not available
-    stream_endpoint = f"{endpoint}/generate/stream"
-    request_data = request.dict()
+    stream_endpoint = app.state.model_urls[model_name]["generate_stream"]
+    request_data = dump_tts_request(request)
     request_data["model"] = model_name
     
-    try:
-        async with client.stream('POST', stream_endpoint, json=request_data, timeout=120.0) as response:
-            if response.status_code == 404:
-                # Streaming not supported, fall back to regular endpoint
-                logger.info(f"Streaming not supported for {model_name}, falling back to regular endpoint")
-                return await generate_tts(model_name, request, settings, client)
-            
-            response.raise_for_status()
-            
-            async def generate():
-                async for chunk in response.aiter_bytes():
-                    yield chunk
-            
-            return Response(
-                generate(),
-                media_type="audio/wav",
-                headers={"Content-Disposition": f"attachment; filename=tts_{model_name}.wav"}
-            )
+    response = await forward_request(stream_endpoint, request_data, client, timeout=120.0, stream=True)
     
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            # Streaming not supported, fall back to regular endpoint
-            return await generate_tts(model_name, request, settings, client)
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Model endpoint error: {e.response.text}"
+    if response.status_code == 200:
+        # The upstream response stays open until the last chunk is sent, so
+        # gateway memory is bounded to one chunk regardless of audio length
+        return StreamingResponse(
+            response.aiter_bytes(chunk_size=64 * 1024),
+            media_type="audio/wav",
+            headers={"Content-Disposition": f"attachment; filename=tts_{model_name}.wav"},
+            background=BackgroundTask(response.aclose)
         )
+    
+    await response.aread()
+    await response.aclose()
+    
+    if response.status_code == 404:
+        # Streaming not supported, fall back to regular endpoint
+        logger.info("Streaming not supported for %s, falling back to regular endpoint", model_name)
+        return await generate_tts(
+            model_name, request, settings, client, response_format=None, accept=None
+        )
+    
+    raise HTTPException(
+        status_code=response.status_code,
+        detail=f"Model endpoint error: {response.text}"
+    )
 
 if __name__ == "__main__":
     # Load settings
     settings = get_settings()
     
+    # uvloop/httptools are not available on Windows
+    server_options = {}
+    if sys.platform != "win32":
+        server_options.update(loop="uvloop", http="httptools")
+    
+    # Reload mode only supports a single worker
+    workers = 1 if settings.debug else (settings.workers or os.cpu_count() or 1)
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=settings.port,
         log_level="info",
-        reload=settings.debug
+        reload=settings.debug,
+        workers=workers,
+        **server_options
     )
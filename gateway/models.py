@@ -7,6 +7,11 @@ from typing import Optional, Dict, Any, List
 from enum import Enum
 from pydantic import BaseModel, Field, validator
 
+try:
+    from pydantic import TypeAdapter
+except ImportError:  # Pydantic v1
+    TypeAdapter = None
+
 
 class TTSModel(str, Enum):
     """Available TTS models"""
@@ -226,3 +231,30 @@ class ErrorResponse(BaseModel):
                 "request_id": "req_12345"
             }
         }
+
+
+# Adapters are built once at import time and reused for every request
+TTSRequestAdapter = TypeAdapter(TTSRequest) if TypeAdapter else None
+TTSResponseAdapter = TypeAdapter(TTSResponse) if TypeAdapter else None
+_TTS_REQUEST_FIELDS = () if TypeAdapter else tuple(TTSRequest.__fields__)
+
+
+def dump_tts_request(request: TTSRequest) -> Dict[str, Any]:
+    """Serialize a TTS request into a JSON-compatible dict"""
+    if TTSRequestAdapter is not None:
+        return TTSRequestAdapter.dump_python(request, mode="json")
+    return {name: getattr(request, name) for name in _TTS_REQUEST_FIELDS}
+
+
+def dump_tts_response(response: TTSResponse) -> Dict[str, Any]:
+    """Serialize a TTS response into a JSON-compatible dict"""
+    if TTSResponseAdapter is not None:
+        return TTSResponseAdapter.dump_python(response, mode="json")
+    return response.dict()
+
+
+def parse_tts_response(data: Dict[str, Any]) -> TTSResponse:
+    """Validate a model endpoint response into a TTSResponse"""
+    if TTSResponseAdapter is not None:
+        return TTSResponseAdapter.validate_python(data)
+    return TTSResponse(**data)
@@ -4,15 +4,17 @@ Chatterbox TTS Model Service
 """
 
 import os
+import json
 import time
 import base64
 import logging
 from io import BytesIO
-from typing import Optional
+from typing import List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+import msgpack
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
 
 from model import ChatterboxTTS, TTSError
@@ -28,9 +30,13 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Chatterbox TTS Service",
     description="Chatterbox Text-to-Speech model service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Maximum number of texts accepted by /generate/batch
+MAX_BATCH_SIZE = 16
+
 # Global model instance
 tts_model: Optional[ChatterboxTTS] = None
 
@@ -53,7 +59,7 @@ async def startup_event():
         logger.info("Chatterbox TTS service started successfully")
         
     except Exception as e:
-        logger.error(f"Failed to initialize Chatterbox TTS model: {str(e)}")
+        logger.error("Failed to initialize Chatterbox TTS model: %s", e)
         raise
 
 @app.on_event("shutdown")
@@ -96,6 +102,15 @@ class TTSResponse(BaseModel):
     error: Optional[str] = None
     warnings: Optional[list] = None
 
+class TTSBatchRequest(BaseModel):
+    """Batch TTS generation request"""
+    items: List[TTSRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class TTSBatchResponse(BaseModel):
+    """Batch TTS generation response, one result per request item"""
+    results: List[TTSResponse]
+    processing_time: float
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -119,7 +134,8 @@ async def health_check():
         "status": "healthy",
         "model_loaded": tts_model.is_loaded,
         "timestamp": time.time(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "wire_formats": ["json", "msgpack"]
     }
 
 @app.get("/info")
@@ -143,10 +159,41 @@ async def model_info():
         }
     }
 
-@app.post("/generate", response_model=TTSResponse)
-async def generate_tts(request: TTSRequest) -> TTSResponse:
+def build_tts_response(
+    request: TTSRequest, metadata: dict, processing_time: float
+) -> TTSResponse:
+    """Build a successful TTSResponse, without audio, from generation metadata"""
+    return TTSResponse(
+        success=True,
+        audio_format=request.format or "wav",
+        duration=metadata.get("duration"),
+        sample_rate=metadata.get("sample_rate", request.sample_rate),
+        voice_used=request.voice_id,
+        language=request.language,
+        processing_time=processing_time,
+        text_length=len(request.text),
+        warnings=metadata.get("warnings")
+    )
+
+def build_tts_error(
+    request: TTSRequest, error: Exception, processing_time: float
+) -> TTSResponse:
+    """Build a failed TTSResponse for a generation error"""
+    return TTSResponse(
+        success=False,
+        audio_format=request.format or "wav",
+        sample_rate=request.sample_rate or 22050,
+        text_length=len(request.text),
+        error=str(error),
+        processing_time=processing_time
+    )
+
+async def run_tts(request: TTSRequest) -> Tuple[TTSResponse, Optional[bytes]]:
     """
-    Generate TTS audio from text
+    Generate TTS audio and return the response metadata with the raw audio
+    
+    The returned TTSResponse has no audio_data; callers attach the audio in
+    their own wire format. Audio is None when generation failed.
     """
     if not tts_model:
         raise HTTPException(
@@ -158,7 +205,7 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
     
     try:
         # Generate audio
-        logger.info(f"Generating TTS for text: '{request.text[:50]}...'")
+        logger.info("Generating TTS for text: '%.50s...'", request.text)
         
         audio_data, metadata = await tts_model.generate(
             text=request.text,
@@ -173,53 +220,142 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
             remove_silence=request.remove_silence
         )
         
-        # Convert audio to base64
         if isinstance(audio_data, bytes):
-            audio_b64 = base64.b64encode(audio_data).decode('utf-8')
+            audio_bytes = audio_data
         else:
             # If audio_data is a file path or BytesIO
-            if hasattr(audio_data, 'read'):
+            if hasattr(audio_data, 'getvalue'):
+                # Whole buffer regardless of position, without seek + read
+                audio_bytes = audio_data.getvalue()
+            elif hasattr(audio_data, 'read'):
                 audio_bytes = audio_data.read()
             else:
                 with open(audio_data, 'rb') as f:
                     audio_bytes = f.read()
-            audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
         
         processing_time = time.time() - start_time
         
-        logger.info(f"TTS generation completed in {processing_time:.2f}s")
+        logger.info("TTS generation completed in %.2fs", processing_time)
         
-        return TTSResponse(
-            success=True,
-            audio_data=audio_b64,
-            audio_format=request.format or "wav",
-            duration=metadata.get("duration"),
-            sample_rate=metadata.get("sample_rate", request.sample_rate),
-            voice_used=request.voice_id,
-            language=request.language,
-            processing_time=processing_time,
-            text_length=len(request.text),
-            warnings=metadata.get("warnings")
-        )
+        return build_tts_response(request, metadata, processing_time), audio_bytes
         
     except TTSError as e:
-        logger.error(f"TTS generation failed: {str(e)}")
-        return TTSResponse(
-            success=False,
-            audio_format=request.format or "wav",
-            sample_rate=request.sample_rate or 22050,
-            text_length=len(request.text),
-            error=str(e),
-            processing_time=time.time() - start_time
-        )
+        logger.error("TTS generation failed: %s", e)
+        return build_tts_error(request, e, time.time() - start_time), None
         
     except Exception as e:
-        logger.error(f"Unexpected error during TTS generation: {str(e)}")
+        logger.error("Unexpected error during TTS generation: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.post("/generate", response_model=TTSResponse)
+async def generate_tts(request: TTSRequest) -> ORJSONResponse:
+    """
+    Generate TTS audio from text
+    """
+    response, audio_bytes = await run_tts(request)
+    
+    # Convert audio to base64
+    if audio_bytes is not None:
+        response.audio_data = base64.b64encode(audio_bytes).decode('ascii')
+    
+    # Serialize directly; response_model is kept for the OpenAPI schema only
+    return ORJSONResponse(content=response.model_dump())
+
+@app.post("/generate/batch", response_model=TTSBatchResponse)
+async def generate_tts_batch(batch: TTSBatchRequest) -> ORJSONResponse:
+    """
+    Generate TTS audio for several texts in one request
+    
+    Audio for all items is synthesized in a single vectorized pass.
+    """
+    if not tts_model:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="TTS model not initialized"
+        )
+    
+    start_time = time.time()
+    
+    try:
+        logger.info("Generating batch TTS for %d texts", len(batch.items))
+        outputs = await tts_model.generate_batch([
+            request.model_dump(exclude_none=True) for request in batch.items
+        ])
+        processing_time = time.time() - start_time
+        
+        results = []
+        for request, (audio_bytes, metadata) in zip(batch.items, outputs):
+            response = build_tts_response(request, metadata, processing_time)
+            response.audio_data = base64.b64encode(audio_bytes).decode('ascii')
+            results.append(response)
+        
+        logger.info("Batch TTS generation completed in %.2fs", processing_time)
+        
+    except TTSError as e:
+        logger.error("Batch TTS generation failed: %s", e)
+        processing_time = time.time() - start_time
+        results = [build_tts_error(request, e, processing_time) for request in batch.items]
+    
+    return ORJSONResponse(content={
+        "results": [response.model_dump() for response in results],
+        "processing_time": processing_time
+    })
+
+@app.post("/generate/raw")
+async def generate_tts_raw(request: TTSRequest) -> Response:
+    """
+    Generate TTS audio and return the raw audio bytes
+    
+    Response metadata is sent in X-* headers instead of a JSON body,
+    avoiding the base64 round-trip.
+    """
+    response, audio_bytes = await run_tts(request)
+    
+    if audio_bytes is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"TTS generation failed: {response.error}"
+        )
+    
+    return Response(
+        content=audio_bytes,
+        media_type="audio/wav",
+        headers={
+            "X-Duration": str(response.duration),
+            "X-Sample-Rate": str(response.sample_rate),
+            "X-Processing-Time": f"{response.processing_time:.3f}",
+            "X-Warnings": json.dumps(response.warnings or [])
+        }
+    )
+
+@app.post("/generate/msgpack")
+async def generate_tts_msgpack(http_request: Request) -> Response:
+    """
+    Generate TTS audio using MessagePack request and response bodies
+    
+    audio_data is sent as raw bytes, avoiding the base64 round-trip.
+    """
+    try:
+        request = TTSRequest(**msgpack.unpackb(await http_request.body(), raw=False))
+    except (ValidationError, ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    response, audio_bytes = await run_tts(request)
+    
+    content = response.model_dump()
+    content["audio_data"] = audio_bytes
+    
+    return Response(
+        content=msgpack.packb(content, use_bin_type=True),
+        media_type="application/msgpack"
+    )
+
 @app.post("/preload")
 async def preload_model():
     """Preload the model for faster inference"""
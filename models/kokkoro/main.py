@@ -4,15 +4,16 @@ Kokkoro TTS Model Service
 """
 
 import os
+import json
 import time
 import base64
 import logging
-from io import BytesIO
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+import msgpack
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
 
 from model import KokkoroTTS, TTSError
@@ -28,7 +29,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Kokkoro TTS Service",
     description="Kokkoro Text-to-Speech model service",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Global model instance
@@ -42,18 +44,20 @@ async def startup_event():
     logger.info("Initializing Kokkoro TTS model...")
     
     try:
-        tts_model = KokkoroTTS()
+        # A preloaded model is warmed up before serving and never falls back
+        # to loading lazily; otherwise the first request loads it
+        preload = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
+        tts_model = KokkoroTTS(lazy_load=not preload)
         
-        # Preload model if environment variable is set
-        if os.getenv("PRELOAD_MODEL", "false").lower() == "true":
+        if preload:
             logger.info("Preloading model...")
-            await tts_model.load_model()
+            await tts_model.warmup()
             logger.info("Model preloaded successfully")
         
         logger.info("Kokkoro TTS service started successfully")
         
     except Exception as e:
-        logger.error(f"Failed to initialize Kokkoro TTS model: {str(e)}")
+        logger.error("Failed to initialize Kokkoro TTS model: %s", e)
         raise
 
 @app.on_event("shutdown")
@@ -119,7 +123,8 @@ async def health_check():
         "status": "healthy",
         "model_loaded": tts_model.is_loaded,
         "timestamp": time.time(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "wire_formats": ["json", "msgpack"]
     }
 
 @app.get("/info")
@@ -142,10 +147,12 @@ async def model_info():
         }
     }
 
-@app.post("/generate", response_model=TTSResponse)
-async def generate_tts(request: TTSRequest) -> TTSResponse:
+async def run_tts(request: TTSRequest) -> Tuple[TTSResponse, Optional[bytes]]:
     """
-    Generate TTS audio from text
+    Generate TTS audio and return the response metadata with the raw audio
+    
+    The returned TTSResponse has no audio_data; callers attach the audio in
+    their own wire format. Audio is None when generation failed.
     """
     if not tts_model:
         raise HTTPException(
@@ -157,7 +164,7 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
     
     try:
         # Generate audio
-        logger.info(f"Generating TTS for text: '{request.text[:50]}...'")
+        logger.info("Generating TTS for text: '%.50s...'", request.text)
         
         audio_data, metadata = await tts_model.generate(
             text=request.text,
@@ -172,25 +179,25 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
             remove_silence=request.remove_silence
         )
         
-        # Convert audio to base64
         if isinstance(audio_data, bytes):
-            audio_b64 = base64.b64encode(audio_data).decode('utf-8')
+            audio_bytes = audio_data
         else:
             # If audio_data is a file path or BytesIO
-            if hasattr(audio_data, 'read'):
+            if hasattr(audio_data, 'getvalue'):
+                # Whole buffer regardless of position, without seek + read
+                audio_bytes = audio_data.getvalue()
+            elif hasattr(audio_data, 'read'):
                 audio_bytes = audio_data.read()
             else:
                 with open(audio_data, 'rb') as f:
                     audio_bytes = f.read()
-            audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
         
         processing_time = time.time() - start_time
         
-        logger.info(f"TTS generation completed in {processing_time:.2f}s")
+        logger.info("TTS generation completed in %.2fs", processing_time)
         
-        return TTSResponse(
+        response = TTSResponse(
             success=True,
-            audio_data=audio_b64,
             audio_format=request.format or "wav",
             duration=metadata.get("duration"),
             sample_rate=metadata.get("sample_rate", request.sample_rate),
@@ -200,10 +207,11 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
             text_length=len(request.text),
             warnings=metadata.get("warnings")
         )
+        return response, audio_bytes
         
     except TTSError as e:
-        logger.error(f"TTS generation failed: {str(e)}")
-        return TTSResponse(
+        logger.error("TTS generation failed: %s", e)
+        response = TTSResponse(
             success=False,
             audio_format=request.format or "wav",
             sample_rate=request.sample_rate or 22050,
@@ -211,13 +219,132 @@ async def generate_tts(request: TTSRequest) -> TTSResponse:
             error=str(e),
             processing_time=time.time() - start_time
         )
+        return response, None
         
     except Exception as e:
-        logger.error(f"Unexpected error during TTS generation: {str(e)}")
+        logger.error("Unexpected error during TTS generation: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+@app.post("/generate", response_model=TTSResponse)
+async def generate_tts(request: TTSRequest) -> ORJSONResponse:
+    """
+    Generate TTS audio from text
+    """
+    response, audio_bytes = await run_tts(request)
+    
+    # Convert audio to base64
+    if audio_bytes is not None:
+        response.audio_data = base64.b64encode(audio_bytes).decode('ascii')
+    
+    # Serialize directly; response_model is kept for the OpenAPI schema only
+    return ORJSONResponse(content=response.model_dump())
+
+@app.post("/generate/raw")
+async def generate_tts_raw(request: TTSRequest) -> Response:
+    """
+    Generate TTS audio and return the raw audio bytes
+    
+    Response metadata is sent in X-* headers instead of a JSON body,
+    avoiding the base64 round-trip.
+    """
+    response, audio_bytes = await run_tts(request)
+    
+    if audio_bytes is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"TTS generation failed: {response.error}"
+        )
+    
+    return Response(
+        content=audio_bytes,
+        media_type="audio/wav",
+        headers={
+            "X-Duration": str(response.duration),
+            "X-Sample-Rate": str(response.sample_rate),
+            "X-Processing-Time": f"{response.processing_time:.3f}",
+            "X-Warnings": json.dumps(response.warnings or [])
+        }
+    )
+
+@app.post("/generate/stream")
+async def generate_tts_stream(request: TTSRequest) -> StreamingResponse:
+    """
+    Generate TTS audio as a progressively streamed WAV file
+    
+    The first chunk is sent as soon as it is synthesized, so playback can
+    start before the whole clip has been generated.
+    """
+    if not tts_model:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="TTS model not initialized"
+        )
+    
+    logger.info("Streaming TTS for text: '%.50s...'", request.text)
+    
+    chunks = tts_model.generate_stream(
+        text=request.text,
+        voice_id=request.voice_id,
+        language=request.language,
+        speed=request.speed,
+        pitch=request.pitch,
+        volume=request.volume,
+        format=request.format or "wav",
+        sample_rate=request.sample_rate,
+        normalize=request.normalize,
+        remove_silence=request.remove_silence
+    )
+    
+    # Pull the header before responding so failures still get an error status
+    try:
+        header = await chunks.__anext__()
+    except TTSError as e:
+        logger.error("TTS streaming failed: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"TTS generation failed: {str(e)}"
+        )
+    except Exception as e:
+        logger.error("Unexpected error during TTS streaming: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
         )
+    
+    async def body():
+        yield header
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(body(), media_type="audio/wav")
+
+@app.post("/generate/msgpack")
+async def generate_tts_msgpack(http_request: Request) -> Response:
+    """
+    Generate TTS audio using MessagePack request and response bodies
+    
+    audio_data is sent as raw bytes, avoiding the base64 round-trip.
+    """
+    try:
+        request = TTSRequest(**msgpack.unpackb(await http_request.body(), raw=False))
+    except (ValidationError, ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    
+    response, audio_bytes = await run_tts(request)
+    
+    content = response.model_dump()
+    content["audio_data"] = audio_bytes
+    
+    return Response(
+        content=msgpack.packb(content, use_bin_type=True),
+        media_type="application/msgpack"
+    )
 
 @app.post("/preload")
 async def preload_model():
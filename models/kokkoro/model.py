@@ -5,16 +5,286 @@ Replace this with your actual Kokkoro model implementation
 """
 
 import os
+import sys
 import asyncio
 import logging
 import numpy as np
-import soundfile as sf
-from io import BytesIO
-from typing import Dict, Any, Tuple, Optional, Union
+from collections import OrderedDict
+from typing import Dict, Any, AsyncIterator, Iterator, List, Tuple, Optional, Union
 import time
+import struct
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+try:
+    from numba import config as numba_config, njit, prange
+except ImportError:  # Fall back to the NumPy DSP path
+    njit = None
+else:
+    # TBB can hang at interpreter exit once parallel kernels have been launched
+    # from executor threads, so prefer OpenMP unless the deployment picked a layer
+    if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        numba_config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
 
 logger = logging.getLogger(__name__)
 
+# Samples generated per sine recurrence run before re-seeding from sin()
+SINE_BLOCK = 4096
+
+# Samples tested per step by the NumPy silence scan before it can stop early
+SCAN_BLOCK = 4096
+
+# Number of generated (audio_bytes, metadata) results kept for repeat requests
+AUDIO_CACHE_SIZE = 256
+
+# Total audio bytes the cache may hold; larger results are never cached
+AUDIO_CACHE_BYTES = 256 * 1024 * 1024
+
+# Threads running synthesis off the event loop. The numba kernels already
+# spread each batch across cores (and the workqueue threading layer cannot
+# take concurrent launches), so they get a single launcher; the NumPy
+# fallback releases the GIL per ufunc and scales with one thread per core.
+SYNTH_WORKERS = int(os.getenv("SYNTH_WORKERS", "0")) or (
+    1 if njit is not None else (os.cpu_count() or 1)
+)
+
+# Float32 samples (30 s at 22.05 kHz) kept per instance for synthesis;
+# larger batches fall back to a fresh allocation
+SCRATCH_SAMPLES = 22050 * 30
+
+# Canonical 44-byte RIFF/WAVE header for uncompressed PCM
+WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+# Little-endian u32 used to patch the RIFF (offset 4) and data (offset 40)
+# chunk sizes into a cached header
+WAV_SIZE_FIELD = struct.Struct("<I")
+
+# Micro-batching: concurrent generate() calls arriving within BATCH_WINDOW
+# seconds of the first are synthesized together, up to MAX_BATCH_SIZE
+MAX_BATCH_SIZE = 8
+BATCH_WINDOW = 0.005
+
+# Speed and pitch outside this range still render but add a warning
+RECOMMENDED_RANGE = (0.5, 2.0)
+
+# Streaming: the first PCM chunk covers STREAM_FIRST_CHUNK seconds, and each
+# following chunk doubles up to STREAM_MAX_CHUNK seconds
+STREAM_FIRST_CHUNK = 0.02
+STREAM_MAX_CHUNK = 0.2
+
+# Defaults applied to every generate_batch() item
+GENERATE_DEFAULTS = {
+    "voice_id": "default",
+    "language": "ja",
+    "speed": 1.0,
+    "pitch": 1.0,
+    "volume": 1.0,
+    "format": "wav",
+    "sample_rate": 22050,
+    "normalize": True,
+    "remove_silence": False
+}
+
+
+@dataclass(frozen=True, slots=True)
+class KokkoroConfig:
+    """Read-only model settings, shared by every request once loaded"""
+    sample_rate: int
+    voices: Tuple[str, ...]
+    languages: Tuple[str, ...]
+
+
+# Used until load_model() reads the real settings from the model
+DEFAULT_CONFIG = KokkoroConfig(
+    sample_rate=22050,
+    voices=("default", "cheerful", "calm", "energetic"),
+    languages=("ja", "en")
+)
+
+if njit is not None:
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _sine_block(out, start, stop, step, amplitude):
+        """
+        Fill out[start:stop] with amplitude * sin(step * i)
+        
+        Uses the two-tap recurrence sin((n+1)x) = 2cos(x)sin(nx) - sin((n-1)x),
+        so each sample costs a multiply and a subtract. Every block re-seeds
+        from exact sin() values to bound rounding drift.
+        """
+        two_cos = 2.0 * np.cos(step)
+        prev = np.sin(step * (start - 1))
+        cur = np.sin(step * start)
+        for i in range(start, stop):
+            out[i] = amplitude * cur
+            prev, cur = cur, two_cos * cur - prev
+    
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _sine_wave(out, step, amplitude):
+        """Fill out with amplitude * sin(step * i), blocks in parallel"""
+        n = out.shape[0]
+        for block in prange((n + SINE_BLOCK - 1) // SINE_BLOCK):
+            start = block * SINE_BLOCK
+            _sine_block(out, start, min(start + SINE_BLOCK, n), step, amplitude)
+    
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _sine_wave_batch(out, lengths, steps, amplitude):
+        """Fill out[b, :lengths[b]] with amplitude * sin(steps[b] * i), blocks in parallel"""
+        blocks = (out.shape[1] + SINE_BLOCK - 1) // SINE_BLOCK
+        for job in prange(out.shape[0] * blocks):
+            row = job // blocks
+            start = (job % blocks) * SINE_BLOCK
+            stop = min(start + SINE_BLOCK, lengths[row])
+            if start < stop:
+                _sine_block(out[row], start, stop, steps[row], amplitude)
+else:
+    def _sine_wave(out, step, amplitude, first=0):
+        """Fill out with amplitude * sin(step * (first + i)) in float32"""
+        # Reduce each block's starting phase mod 2*pi in float64 so the
+        # float32 arguments stay small however long the clip is
+        offsets = np.arange(min(SINE_BLOCK, out.shape[0]), dtype=np.float32)
+        offsets *= np.float32(step)
+        for start in range(0, out.shape[0], SINE_BLOCK):
+            block = out[start:start + SINE_BLOCK]
+            phase = ((first + start) * step) % (2 * np.pi)
+            np.add(offsets[:block.shape[0]], np.float32(phase), out=block)
+            np.sin(block, out=block)
+        out *= np.float32(amplitude)
+    
+    def _sine_wave_batch(out, lengths, steps, amplitude):
+        """Fill out[b, :lengths[b]] with amplitude * sin(steps[b] * i), row by row"""
+        for row, length, step in zip(out, lengths, steps):
+            _sine_wave(row[:length], step, amplitude)
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _linear_resample(src, new_len):
+        """Linear-interpolate src onto new_len evenly spaced float32 samples"""
+        out = np.empty(new_len, dtype=np.float32)
+        last = src.shape[0] - 1
+        ratio = last / max(new_len - 1, 1)
+        for i in prange(new_len):
+            # Positions need float64 to index long clips; the blend stays float32
+            pos = i * ratio
+            i0 = min(int(pos), last - 1)
+            frac = np.float32(pos - i0)
+            lower = src[i0]
+            out[i] = lower + (src[i0 + 1] - lower) * frac
+        return out
+else:
+    def _linear_resample(src, new_len):
+        """Linear-interpolate src onto new_len evenly spaced float32 samples"""
+        # Floor + blend in place instead of np.interp: no index-grid search,
+        # and only the positions, indices and two gathers are allocated
+        last = src.shape[0] - 1
+        pos = np.arange(new_len, dtype=np.float64)
+        pos *= last / max(new_len - 1, 1)
+        i0 = pos.astype(np.intp)
+        np.minimum(i0, last - 1, out=i0)
+        pos -= i0
+        lower = src[i0]
+        out = src[1:][i0]
+        out -= lower
+        np.multiply(out, pos, out=out, casting="same_kind")
+        out += lower
+        return out
+
+if njit is not None:
+    @njit(nogil=True, fastmath=True, cache=True)
+    def _trim_bounds(x, thr):
+        """Get [start, end) of the samples louder than thr, scanning from both ends"""
+        n = x.shape[0]
+        start = 0
+        while start < n and abs(x[start]) <= thr:
+            start += 1
+        end = n
+        while end > start and abs(x[end - 1]) <= thr:
+            end -= 1
+        return start, end
+else:
+    def _trim_bounds(x, thr):
+        """Get [start, end) of the samples louder than thr, scanning blocks inward from both ends"""
+        n = x.shape[0]
+        for lo in range(0, n, SCAN_BLOCK):
+            hits = np.flatnonzero(np.abs(x[lo:lo + SCAN_BLOCK]) > thr)
+            if hits.size:
+                start = lo + int(hits[0])
+                break
+        else:
+            return 0, 0
+        
+        # The sample at start is loud, so this scan always finds a hit
+        for hi in range(n, start, -SCAN_BLOCK):
+            lo = max(hi - SCAN_BLOCK, start)
+            hits = np.flatnonzero(np.abs(x[lo:hi]) > thr)
+            if hits.size:
+                return start, lo + int(hits[-1]) + 1
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _finalize(audio, pitch, volume, normalize):
+        """Apply pitch * volume gain, optional 0.9 peak normalization and [-1, 1] clipping in place"""
+        scale = pitch * volume
+        if normalize:
+            peak = np.float32(0.0)
+            for i in prange(audio.shape[0]):
+                peak = max(peak, abs(audio[i]))
+            if peak > 0 and scale != 0:
+                scale = 0.9 / peak if scale > 0 else -0.9 / peak
+        
+        # Keep the per-sample math in float32
+        gain = np.float32(scale)
+        one = np.float32(1.0)
+        for i in prange(audio.shape[0]):
+            audio[i] = min(one, max(-one, audio[i] * gain))
+else:
+    def _finalize(audio, pitch, volume, normalize):
+        """Apply pitch * volume gain, optional 0.9 peak normalization and [-1, 1] clipping in place"""
+        scale = pitch * volume
+        if normalize and audio.size:
+            peak = max(float(audio.max()), -float(audio.min())) * abs(scale)
+            if peak > 0:
+                scale *= 0.9 / peak
+        audio *= np.float32(scale)
+        np.clip(audio, -1.0, 1.0, out=audio)
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _to_pcm16(audio, out):
+        """Round audio into int16 out, saturating outside [-1, 1]"""
+        one = np.float32(1.0)
+        full_scale = np.float32(32767.0)
+        for i in prange(audio.shape[0]):
+            out[i] = np.int16(np.rint(min(max(audio[i], -one), one) * full_scale))
+else:
+    def _to_pcm16(audio, out):
+        """Round audio into int16 out, saturating outside [-1, 1]"""
+        scaled = np.multiply(audio, np.float32(32767.0), dtype=np.float32)
+        np.clip(scaled, -32767.0, 32767.0, out=scaled)
+        np.rint(scaled, out=scaled)
+        out[:] = scaled
+
+if njit is not None:
+    @njit(parallel=True, nogil=True, fastmath=True, cache=True)
+    def _sine_pcm16(out, first, step, amplitude):
+        """Fill int16 out with amplitude * sin(step * (first + i)), saturating, without a float buffer"""
+        n = out.shape[0]
+        two_cos = 2.0 * np.cos(step)
+        for block in prange((n + SINE_BLOCK - 1) // SINE_BLOCK):
+            start = block * SINE_BLOCK
+            prev = np.sin(step * (first + start - 1))
+            cur = np.sin(step * (first + start))
+            for i in range(start, min(start + SINE_BLOCK, n)):
+                out[i] = np.int16(np.rint(min(max(amplitude * cur, -1.0), 1.0) * 32767.0))
+                prev, cur = cur, two_cos * cur - prev
+else:
+    def _sine_pcm16(out, first, step, amplitude):
+        """Fill int16 out with amplitude * sin(step * (first + i)), saturating"""
+        audio = np.empty(out.shape[0], dtype=np.float32)
+        _sine_wave(audio, step, amplitude, first)
+        _to_pcm16(audio, out)
+
 class TTSError(Exception):
     """Custom TTS error"""
     pass
@@ -26,12 +296,36 @@ class KokkoroTTS:
     This is a template implementation. Replace with your actual Kokkoro model.
     """
     
-    def __init__(self):
+    def __init__(self, lazy_load: bool = True):
         self.model = None
+        self.config = DEFAULT_CONFIG
         self.is_loaded = False
+        # When False, requests fail fast instead of loading the model themselves
+        self.lazy_load = lazy_load
+        self._load_lock = asyncio.Lock()
         self.cache_dir = "/app/cache"
         self.weights_dir = "/app/weights"
         
+        # LRU of generated audio keyed by every generate() parameter, most recent last
+        self._cache: "OrderedDict[tuple, Tuple[bytes, Dict[str, Any]]]" = OrderedDict()
+        self._cache_bytes = 0
+        
+        # Header templates by sample rate, sizes patched in per file
+        self._wav_headers: Dict[int, np.ndarray] = {}
+        
+        # Reused synthesis buffer, held by one batch at a time
+        self._scratch = np.empty(SCRATCH_SAMPLES, dtype=np.float32)
+        self._scratch_lock = threading.Lock()
+        
+        # CPU-bound synthesis and encoding run here so the event loop keeps serving I/O
+        self._executor = ThreadPoolExecutor(
+            max_workers=SYNTH_WORKERS, thread_name_prefix="kokkoro-synth"
+        )
+        
+        # Pending (params, future) pairs drained by the micro-batcher task
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher_task: Optional[asyncio.Task] = None
+        
         # Ensure directories exist
         os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.weights_dir, exist_ok=True)
@@ -44,6 +338,13 @@ class KokkoroTTS:
             logger.info("Model already loaded")
             return
         
+        # Single-flight: concurrent first requests wait for one load
+        async with self._load_lock:
+            if not self.is_loaded:
+                await self._load_model()
+    
+    async def _load_model(self):
+        """Load the model weights; callers must hold _load_lock"""
         try:
             logger.info("Loading Kokkoro TTS model...")
             
@@ -55,6 +356,9 @@ class KokkoroTTS:
             # Simulate model loading time
             await asyncio.sleep(2)
             
+            # Compile (or load the cached) DSP kernels before serving
+            await self._run_sync(self._warmup_kernels)
+            
             # Mock model (replace with actual model)
             self.model = {
                 "name": "kokkoro",
@@ -62,14 +366,56 @@ class KokkoroTTS:
                 "sample_rate": 22050,
                 "loaded": True
             }
+            self.config = KokkoroConfig(
+                sample_rate=self.model["sample_rate"],
+                voices=DEFAULT_CONFIG.voices,
+                languages=DEFAULT_CONFIG.languages
+            )
+            
+            self._queue = asyncio.Queue()
+            self._batcher_task = asyncio.create_task(self._batcher())
             
             self.is_loaded = True
             logger.info("Kokkoro TTS model loaded successfully")
             
         except Exception as e:
-            logger.error(f"Failed to load Kokkoro TTS model: {str(e)}")
+            logger.error("Failed to load Kokkoro TTS model: %s", e)
             raise TTSError(f"Model loading failed: {str(e)}")
     
+    async def warmup(self):
+        """Load the model and push a request through each render path before serving"""
+        await self.load_model()
+        
+        # Bypasses the audio cache so warmup text never reaches it
+        await self.generate_batch([
+            {"text": "warm", "normalize": False},
+            {"text": "warm", "speed": 1.5, "remove_silence": True}
+        ])
+        logger.info("Kokkoro TTS model warmed up")
+    
+    async def _ensure_loaded(self):
+        """Load the model on first use, or refuse when lazy loading is disabled"""
+        if not self.is_loaded:
+            if not self.lazy_load:
+                raise TTSError("Model not warmed up")
+            await self.load_model()
+        
+        if not self.model:
+            raise TTSError("Model not loaded")
+    
+    def _warmup_kernels(self):
+        """Run every DSP kernel once on tiny inputs"""
+        warmup = np.zeros(16, dtype=np.float32)
+        _linear_resample(warmup, 8)
+        _trim_bounds(warmup, 0.01)
+        _finalize(warmup, 1.0, 1.0, True)
+        _to_pcm16(warmup, np.empty(16, dtype=np.int16))
+        _sine_pcm16(np.empty(16, dtype=np.int16), 0, 0.1, 0.3)
+        _sine_wave(warmup, 0.1, 0.3)
+        _sine_wave_batch(
+            np.empty((2, 16), dtype=np.float32), np.array([16, 8]), np.full(2, 0.1), 0.3
+        )
+    
     async def generate(
         self,
         text: str,
@@ -102,121 +448,451 @@ class KokkoroTTS:
             Tuple of (audio_bytes, metadata)
         """
         
-        if not self.is_loaded:
-            await self.load_model()
+        await self._ensure_loaded()
         
-        if not self.model:
-            raise TTSError("Model not loaded")
+        # cleanup() may have unloaded the model while this call was starting
+        if self._queue is None:
+            raise TTSError("Model unloaded")
         
-        try:
-            logger.info(f"Generating audio for: '{text[:50]}...' with voice '{voice_id}'")
+        key = (
+            text, voice_id, language, speed, pitch, volume,
+            format, sample_rate, normalize, remove_silence
+        )
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            logger.info("Returning cached audio for: '%.50s...'", text)
+            return self._copy_result(cached)
+        
+        logger.info("Generating audio for: '%.50s...' with voice '%s'", text, voice_id)
+        
+        # Hand the request to the micro-batcher and wait for its share of the batch
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(({
+            "text": text,
+            "voice_id": voice_id,
+            "language": language,
+            "speed": speed,
+            "pitch": pitch,
+            "volume": volume,
+            "format": format,
+            "sample_rate": sample_rate,
+            "normalize": normalize,
+            "remove_silence": remove_silence
+        }, future))
+        audio_bytes, metadata = await future
+        
+        self._cache_put(key, (audio_bytes, metadata))
+        
+        logger.info("Audio generation completed. Duration: %.2fs", metadata["duration"])
+        return self._copy_result((audio_bytes, metadata))
+    
+    def _cache_put(self, key: tuple, result: Tuple[bytes, Dict[str, Any]]):
+        """Store result, evicting least recently used entries past the count or byte limit"""
+        size = len(result[0])
+        if size > AUDIO_CACHE_BYTES:
+            return
+        
+        # Concurrent identical requests can both finish generating
+        previous = self._cache.pop(key, None)
+        if previous is not None:
+            self._cache_bytes -= len(previous[0])
+        
+        self._cache[key] = result
+        self._cache_bytes += size
+        while len(self._cache) > AUDIO_CACHE_SIZE or self._cache_bytes > AUDIO_CACHE_BYTES:
+            _, (evicted, _) = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
+    
+    async def generate_batch(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Generate TTS audio for several texts with one batched synthesis pass
+        
+        Args:
+            items: Keyword arguments for generate(), one dict per text
             
+        Returns:
+            List of (audio_bytes, metadata) in the order of items
+        """
+        
+        await self._ensure_loaded()
+        
+        return await self._run_sync(
+            self._generate_batch, [{**GENERATE_DEFAULTS, **item} for item in items]
+        )
+    
+    async def generate_stream(
+        self,
+        text: str,
+        voice_id: Optional[str] = "default",
+        language: Optional[str] = "ja",
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        volume: float = 1.0,
+        format: str = "wav",
+        sample_rate: int = 22050,
+        normalize: bool = True,
+        remove_silence: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Generate TTS audio as a PCM16 WAV file delivered in growing chunks
+        
+        Yields the 44-byte header, then PCM chunks growing from
+        STREAM_FIRST_CHUNK to STREAM_MAX_CHUNK seconds. Requests that the
+        direct path can render are synthesized chunk by chunk, so the first
+        audio is ready before the rest of the clip exists; anything needing
+        the whole clip first (speed change, normalization, silence trimming)
+        is generated in full and then sent in the same chunks.
+        
+        Args:
+            Same as generate()
+        """
+        
+        await self._ensure_loaded()
+        
+        params = {
+            "text": text,
+            "voice_id": voice_id,
+            "language": language,
+            "speed": speed,
+            "pitch": pitch,
+            "volume": volume,
+            "format": format,
+            "sample_rate": sample_rate,
+            "normalize": normalize,
+            "remove_silence": remove_silence
+        }
+        
+        if not self._is_direct(params):
+            audio_bytes, metadata = await self.generate(**params)
+            audio = memoryview(audio_bytes)
+            yield bytes(audio[:WAV_HEADER.size])
+            num_samples = (len(audio_bytes) - WAV_HEADER.size) // 2
+            for start, stop in self._stream_chunks(num_samples, sample_rate):
+                yield bytes(audio[WAV_HEADER.size + start * 2:WAV_HEADER.size + stop * 2])
+            return
+        
+        logger.info("Streaming audio for: '%.50s...' with voice '%s'", text, voice_id)
+        
+        num_samples, step = self._mock_plan(text, sample_rate)
+        amplitude = 0.3 * pitch * volume
+        yield self._wav_header(num_samples, sample_rate)
+        for start, stop in self._stream_chunks(num_samples, sample_rate):
+            yield await self._run_sync(self._sine_chunk, start, stop, step, amplitude)
+    
+    def _stream_chunks(self, num_samples: int, sample_rate: int) -> Iterator[Tuple[int, int]]:
+        """Split num_samples into [start, stop) chunks that double up to STREAM_MAX_CHUNK"""
+        size = max(int(STREAM_FIRST_CHUNK * sample_rate), 1)
+        max_size = max(int(STREAM_MAX_CHUNK * sample_rate), size)
+        start = 0
+        while start < num_samples:
+            stop = min(start + size, num_samples)
+            yield start, stop
+            start = stop
+            size = min(size * 2, max_size)
+    
+    def _sine_chunk(self, start: int, stop: int, step: float, amplitude: float) -> bytes:
+        """Render samples [start, stop) of the mock sine as little-endian PCM16"""
+        samples = np.empty(stop - start, dtype=np.int16)
+        _sine_pcm16(samples, start, step, amplitude)
+        if sys.byteorder != "little":
+            samples.byteswap(inplace=True)
+        return samples.tobytes()
+    
+    async def _batcher(self):
+        """Drain the request queue, synthesizing requests that arrive together as one batch"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Requests taken off the queue; fail them below if this batch never completes
+            batch = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + BATCH_WINDOW
+                while len(batch) < MAX_BATCH_SIZE:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                
+                # Skip callers that gave up while queued
+                batch = [(params, future) for params, future in batch if not future.done()]
+                if not batch:
+                    continue
+                
+                results = await self._run_sync(
+                    self._generate_batch_isolated, [params for params, _ in batch]
+                )
+                for (_, future), result in zip(batch, results):
+                    # The caller may have been cancelled while the batch ran
+                    if future.done():
+                        continue
+                    if isinstance(result, TTSError):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            except asyncio.CancelledError:
+                # Stopped by cleanup(); callers awaiting this batch must not hang
+                self._fail_batch(batch, TTSError("Model unloaded"))
+                raise
+            except Exception as e:
+                # An error _generate_batch_isolated did not turn into a per-item
+                # TTSError fails only this batch; keep serving the queue
+                logger.error("Batch generation failed: %s", e)
+                self._fail_batch(batch, e)
+    
+    def _fail_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]], error: BaseException):
+        """Set error on every future in batch that is still waiting"""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+    
+    def _generate_batch_isolated(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Union[Tuple[bytes, Dict[str, Any]], TTSError]]:
+        """Run _generate_batch, returning per-item errors instead of failing the whole batch"""
+        try:
+            return self._generate_batch(items)
+        except TTSError:
+            # Retry one by one so a bad request cannot fail the rest of its batch
+            results = []
+            for item in items:
+                try:
+                    results.extend(self._generate_batch([item]))
+                except TTSError as e:
+                    results.append(e)
+            return results
+    
+    def _generate_batch(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Tuple[bytes, Dict[str, Any]]]:
+        """Synthesize fully specified generate() parameter dicts as one padded batch"""
+        
+        if not items:
+            return []
+        
+        try:
             # TODO: Replace with actual Kokkoro TTS inference
             # Example:
-            # audio_array = self.model.synthesize(
-            #     text=text,
+            # audio_arrays = self.model.synthesize_batch(
+            #     texts=[item["text"] for item in items],
             #     voice=voice_id,
             #     language=language,
             #     speed=speed,
             #     pitch=pitch
             # )
             
-            # Mock audio generation (replace with actual implementation)
-            duration = len(text) * 0.1  # Estimate duration
-            num_samples = int(duration * sample_rate)
+            # Mock audio generation (replace with actual implementation):
+            # a sine per text, padded into one (B, Nmax) batch
+            plans = [self._mock_plan(item["text"], item["sample_rate"]) for item in items]
+            lengths = np.array([num_samples for num_samples, _ in plans], dtype=np.int64)
+            steps = np.array([step for _, step in plans], dtype=np.float64)
             
-            # Generate mock audio (sine wave based on text)
-            t = np.linspace(0, duration, num_samples, False)
-            frequency = 440 + (hash(text) % 200)  # Base frequency varies by text
-            audio_array = np.sin(2 * np.pi * frequency * t) * 0.3
+            # Plain WAV requests with nothing to resample, normalize or trim
+            # are quantized straight from the sine; the rest share one batch
+            results: List[Optional[Tuple[bytes, Dict[str, Any]]]] = [None] * len(items)
+            batched = []
+            for index, item in enumerate(items):
+                if self._is_direct(item):
+                    results[index] = self._render_direct(int(lengths[index]), steps[index], item)
+                else:
+                    batched.append(index)
             
-            # Apply speed modification
-            if speed != 1.0:
-                new_length = int(len(audio_array) / speed)
-                audio_array = np.interp(
-                    np.linspace(0, len(audio_array), new_length),
-                    np.arange(len(audio_array)),
-                    audio_array
+            if batched:
+                rendered = self._render_batch(
+                    [items[index] for index in batched], lengths[batched], steps[batched]
                 )
+                for index, result in zip(batched, rendered):
+                    results[index] = result
             
-            # Apply pitch modification (simple pitch shifting)
-            if pitch != 1.0:
-                audio_array = audio_array * pitch
-            
-            # Apply volume
-            audio_array = audio_array * volume
-            
-            # Normalize if requested
-            if normalize:
-                max_val = np.max(np.abs(audio_array))
-                if max_val > 0:
-                    audio_array = audio_array / max_val * 0.9
-            
-            # Remove silence if requested
-            if remove_silence:
-                # Simple silence removal (threshold-based)
-                threshold = 0.01
-                non_silent = np.abs(audio_array) > threshold
-                if np.any(non_silent):
-                    start_idx = np.argmax(non_silent)
-                    end_idx = len(audio_array) - np.argmax(non_silent[::-1]) - 1
-                    audio_array = audio_array[start_idx:end_idx+1]
-            
-            # Convert to bytes
-            audio_bytes = self._array_to_bytes(audio_array, sample_rate, format)
-            
-            # Prepare metadata
-            metadata = {
-                "duration": len(audio_array) / sample_rate,
-                "sample_rate": sample_rate,
-                "format": format,
-                "voice_used": voice_id,
-                "language": language,
-                "warnings": []
-            }
-            
-            # Add warnings if parameters are out of recommended range
-            if speed < 0.5 or speed > 2.0:
-                metadata["warnings"].append(f"Speed {speed} is outside recommended range (0.5-2.0)")
-            
-            if pitch < 0.5 or pitch > 2.0:
-                metadata["warnings"].append(f"Pitch {pitch} is outside recommended range (0.5-2.0)")
-            
-            logger.info(f"Audio generation completed. Duration: {metadata['duration']:.2f}s")
-            return audio_bytes, metadata
+            return results
             
         except Exception as e:
-            logger.error(f"Audio generation failed: {str(e)}")
+            logger.error("Audio generation failed: %s", e)
             raise TTSError(f"Audio generation failed: {str(e)}")
     
-    def _array_to_bytes(self, audio_array: np.ndarray, sample_rate: int, format: str) -> bytes:
-        """Convert numpy array to audio bytes"""
+    def _mock_plan(self, text: str, sample_rate: int) -> Tuple[int, float]:
+        """Get the mock sine's (num_samples, radians per sample) for text"""
+        # Duration is estimated from the text length and the base frequency
+        # varies by text; crc32 is stable across processes, unlike hash()
+        # under PYTHONHASHSEED
+        duration = len(text) * 0.1
+        frequency = 440 + (zlib.crc32(text.encode("utf-8")) % 200)
+        return int(duration * sample_rate), 2 * np.pi * frequency / sample_rate
+    
+    def _render_batch(
+        self, items: List[Dict[str, Any]], lengths: np.ndarray, steps: np.ndarray
+    ) -> List[Tuple[bytes, Dict[str, Any]]]:
+        """Synthesize the sines as one padded (B, Nmax) batch and render each row"""
+        rows, cols = len(items), int(lengths.max())
         
-        # Ensure audio is in valid range
-        audio_array = np.clip(audio_array, -1.0, 1.0)
+        # Concurrent batches (e.g. generate_batch() beside the micro-batcher)
+        # fall back to a fresh allocation instead of waiting for the scratch
+        use_scratch = (
+            rows * cols <= self._scratch.shape[0]
+            and self._scratch_lock.acquire(blocking=False)
+        )
+        try:
+            if use_scratch:
+                batch = self._scratch[:rows * cols].reshape(rows, cols)
+            else:
+                batch = np.empty((rows, cols), dtype=np.float32)
+            _sine_wave_batch(batch, lengths, steps, 0.3)
+            
+            return [
+                self._render(row[:length], item)
+                for row, length, item in zip(batch, lengths, items)
+            ]
+        finally:
+            if use_scratch:
+                self._scratch_lock.release()
+    
+    def _is_direct(self, params: Dict[str, Any]) -> bool:
+        """Whether the request needs nothing beyond a gain before WAV encoding"""
+        return (
+            params["speed"] == 1.0
+            and not params["normalize"]
+            and not params["remove_silence"]
+            and params["format"].lower() == "wav"
+        )
+    
+    def _render_direct(
+        self, num_samples: int, step: float, params: Dict[str, Any]
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Write the gained, saturated sine straight into a PCM16 WAV buffer"""
+        wav, samples = self._wav_buffer(num_samples, params["sample_rate"])
+        _sine_pcm16(samples, 0, step, 0.3 * params["pitch"] * params["volume"])
+        if sys.byteorder != "little":
+            samples.byteswap(inplace=True)
         
-        # Create BytesIO buffer
-        buffer = BytesIO()
+        return wav.tobytes(), self._metadata(num_samples, params)
+    
+    async def _run_sync(self, func, *args):
+        """Run CPU-bound work on the synthesis executor without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+    
+    def _render(
+        self, audio_array: np.ndarray, params: Dict[str, Any]
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Apply the post-processing chain to synthesized audio and encode it"""
+        speed = params["speed"]
+        pitch = params["pitch"]
+        sample_rate = params["sample_rate"]
+        
+        # Apply speed modification
+        if speed != 1.0 and len(audio_array) > 1:
+            new_length = int(len(audio_array) / speed)
+            if new_length > 0:
+                audio_array = _linear_resample(audio_array, new_length)
+        
+        # Apply pitch (simple gain) and volume, normalize if requested and
+        # clip to [-1, 1], all in one fused pass
+        _finalize(audio_array, pitch, params["volume"], params["normalize"])
+        
+        # Remove silence if requested
+        if params["remove_silence"]:
+            # Simple silence removal (threshold-based)
+            start_idx, end_idx = _trim_bounds(audio_array, 0.01)
+            if start_idx < end_idx:
+                audio_array = audio_array[start_idx:end_idx]
+        
+        # Convert to bytes
+        audio_bytes = self._array_to_bytes(audio_array, sample_rate, params["format"])
+        
+        return audio_bytes, self._metadata(len(audio_array), params)
+    
+    def _metadata(self, num_samples: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata returned alongside num_samples of rendered audio"""
+        sample_rate = params["sample_rate"]
+        
+        # Warn about parameters outside the recommended range; messages are
+        # only formatted for values that are actually out of range
+        low, high = RECOMMENDED_RANGE
+        warnings = [
+            f"{name} {value} is outside recommended range ({low}-{high})"
+            for name, value in (("Speed", params["speed"]), ("Pitch", params["pitch"]))
+            if value < low or value > high
+        ]
+        
+        return {
+            "duration": num_samples / sample_rate,
+            "sample_rate": sample_rate,
+            "format": params["format"],
+            "voice_used": params["voice_id"],
+            "language": params["language"],
+            "warnings": warnings
+        }
+    
+    def _copy_result(
+        self, result: Tuple[bytes, Dict[str, Any]]
+    ) -> Tuple[bytes, Dict[str, Any]]:
+        """Copy a cached result's metadata so callers cannot mutate the cache"""
+        audio_bytes, metadata = result
+        return audio_bytes, {**metadata, "warnings": list(metadata["warnings"])}
+    
+    def _array_to_bytes(self, audio_array: np.ndarray, sample_rate: int, format: str) -> bytes:
+        """Convert numpy array to audio bytes"""
         
         try:
-            if format.lower() == "wav":
-                sf.write(buffer, audio_array, sample_rate, format='WAV')
-            elif format.lower() == "mp3":
+            if format.lower() == "mp3":
                 # For MP3, we'd need additional libraries like pydub
                 # For now, fall back to WAV
                 logger.warning("MP3 format not fully supported, using WAV")
-                sf.write(buffer, audio_array, sample_rate, format='WAV')
-            else:
-                # Default to WAV
-                sf.write(buffer, audio_array, sample_rate, format='WAV')
             
-            buffer.seek(0)
-            return buffer.read()
+            # WAV, and the fallback for every other format, is written
+            # directly from the float32 samples as PCM16
+            return self._pcm16_wav(audio_array, sample_rate)
             
         except Exception as e:
-            logger.error(f"Failed to convert audio to {format}: {str(e)}")
+            logger.error("Failed to convert audio to %s: %s", format, e)
             raise TTSError(f"Audio format conversion failed: {str(e)}")
     
+    def _pcm16_wav(self, audio: np.ndarray, sample_rate: int) -> bytes:
+        """
+        Build a mono PCM16 WAV file without going through libsndfile
+        
+        Samples are clipped and quantized in one pass straight into the
+        file buffer behind the 44-byte header.
+        """
+        wav, samples = self._wav_buffer(len(audio), sample_rate)
+        _to_pcm16(audio, samples)
+        if sys.byteorder != "little":
+            samples.byteswap(inplace=True)
+        
+        return wav.tobytes()
+    
+    def _wav_buffer(self, num_samples: int, sample_rate: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Allocate a mono PCM16 WAV file with its header written; returns (file, int16 samples view)"""
+        header = self._wav_headers.get(sample_rate)
+        if header is None:
+            header = np.empty(WAV_HEADER.size, dtype=np.uint8)
+            WAV_HEADER.pack_into(
+                header, 0,
+                b"RIFF", 36, b"WAVE",
+                b"fmt ", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16,
+                b"data", 0
+            )
+            self._wav_headers[sample_rate] = header
+        
+        data_len = num_samples * 2
+        wav = np.empty(WAV_HEADER.size + data_len, dtype=np.uint8)
+        wav[:WAV_HEADER.size] = header
+        WAV_SIZE_FIELD.pack_into(wav, 4, 36 + data_len)
+        WAV_SIZE_FIELD.pack_into(wav, 40, data_len)
+        return wav, wav[WAV_HEADER.size:].view(np.int16)
+    
+    def _wav_header(self, num_samples: int, sample_rate: int) -> bytes:
+        """Get just the 44-byte header of a mono PCM16 WAV file of num_samples"""
+        header, _ = self._wav_buffer(0, sample_rate)
+        WAV_SIZE_FIELD.pack_into(header, 4, 36 + num_samples * 2)
+        WAV_SIZE_FIELD.pack_into(header, 40, num_samples * 2)
+        return header.tobytes()
+    
     async def cleanup(self):
         """Cleanup resources"""
         logger.info("Cleaning up Kokkoro TTS model...")
@@ -225,19 +901,30 @@ class KokkoroTTS:
         # if self.model:
         #     self.model.cleanup()
         
+        # Stop the micro-batcher and fail anything still queued
+        if self._batcher_task:
+            self._batcher_task.cancel()
+            self._batcher_task = None
+        if self._queue:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(TTSError("Model unloaded"))
+            self._queue = None
+        
         self.model = None
         self.is_loaded = False
+        self._cache.clear()
+        self._cache_bytes = 0
         logger.info("Kokkoro TTS model cleanup completed")
     
-    def get_available_voices(self) -> list:
-        """Get list of available voices"""
-        # TODO: Replace with actual voice list from model
-        return ["default", "cheerful", "calm", "energetic"]
+    def get_available_voices(self) -> Tuple[str, ...]:
+        """Get the available voices"""
+        return self.config.voices
     
-    def get_supported_languages(self) -> list:
-        """Get list of supported languages"""
-        # TODO: Replace with actual language list from model
-        return ["ja", "en"]
+    def get_supported_languages(self) -> Tuple[str, ...]:
+        """Get the supported languages"""
+        return self.config.languages
     
     def validate_parameters(
         self,
@@ -258,13 +945,11 @@ class KokkoroTTS:
             errors.append("Text too long (max 1000 characters)")
         
         # Validate voice
-        available_voices = self.get_available_voices()
-        if voice_id not in available_voices:
+        if voice_id not in self.config.voices:
             warnings.append(f"Voice '{voice_id}' not found, using 'default'")
         
         # Validate language
-        supported_languages = self.get_supported_languages()
-        if language not in supported_languages:
+        if language not in self.config.languages:
             warnings.append(f"Language '{language}' not fully supported")
         
         return {